@@ -0,0 +1,81 @@
+# cython: language_level=3, boundscheck=False, wraparound=False, cdivision=True
+# distutils: extra_compile_args = -O3 -fopenmp
+# distutils: extra_link_args = -fopenmp
+"""
+Compiled time-window matcher for pathsync.py. Build it next to the script with:
+
+    python3 -m pip install cython
+    cythonize -i _haversine.pyx
+"""
+import numpy as np
+from cython.parallel import prange
+cimport openmp
+from libc.stdint cimport int64_t
+
+cdef inline float _hav(float s_lat1, float c_lat1, float s_lon1, float c_lon1, float cos_lat1,
+                       float s_lat2, float c_lat2, float s_lon2, float c_lon2, float cos_lat2) noexcept nogil:
+    # Haversine term from precomputed float32 half-angle sines/cosines (see pathsync.haversine_a)
+    cdef float sin_dlat = s_lat2 * c_lat1 - c_lat2 * s_lat1
+    cdef float sin_dlon = s_lon2 * c_lon1 - c_lon2 * s_lon1
+    return sin_dlat * sin_dlat + cos_lat1 * cos_lat2 * sin_dlon * sin_dlon
+
+def match_windows(const int64_t[::1] window_lo, const int64_t[::1] window_hi,
+                  const float[::1] s_lat1, const float[::1] c_lat1, const float[::1] s_lon1,
+                  const float[::1] c_lon1, const float[::1] cos_lat1,
+                  const float[::1] s_lat2, const float[::1] c_lat2, const float[::1] s_lon2,
+                  const float[::1] c_lon2, const float[::1] cos_lat2, double a_threshold,
+                  int num_threads=0):
+    """
+    Two-pass parallel pre-filter with the same signature and results as pathsync's Numba
+    kernel: counts hits per event, then fills preallocated index arrays. Runs on up to
+    num_threads OpenMP threads (all of them when 0).
+    """
+    cdef Py_ssize_t n = window_lo.shape[0]
+    cdef Py_ssize_t i
+    if num_threads <= 0:
+        num_threads = openmp.omp_get_max_threads()
+    counts_arr = np.zeros(n + 1, dtype=np.int64)
+    cdef int64_t[::1] counts = counts_arr
+    with nogil:
+        for i in prange(n, schedule='guided', num_threads=num_threads):
+            counts[i + 1] = _count_row(i, window_lo, window_hi, s_lat1, c_lat1, s_lon1, c_lon1, cos_lat1,
+                                       s_lat2, c_lat2, s_lon2, c_lon2, cos_lat2, a_threshold)
+    offsets_arr = np.cumsum(counts_arr)
+    cdef int64_t[::1] offsets = offsets_arr
+    total = offsets_arr[n]
+    out_i_arr = np.empty(total, dtype=np.int64)
+    out_j_arr = np.empty(total, dtype=np.int64)
+    cdef int64_t[::1] out_i = out_i_arr
+    cdef int64_t[::1] out_j = out_j_arr
+    with nogil:
+        for i in prange(n, schedule='guided', num_threads=num_threads):
+            _fill_row(i, offsets[i], window_lo, window_hi, s_lat1, c_lat1, s_lon1, c_lon1, cos_lat1,
+                      s_lat2, c_lat2, s_lon2, c_lon2, cos_lat2, a_threshold, out_i, out_j)
+    return out_i_arr, out_j_arr
+
+# Per-row helpers keep the loop counters private to each OpenMP thread
+cdef int64_t _count_row(Py_ssize_t i, const int64_t[::1] window_lo, const int64_t[::1] window_hi,
+                        const float[::1] s_lat1, const float[::1] c_lat1, const float[::1] s_lon1,
+                        const float[::1] c_lon1, const float[::1] cos_lat1,
+                        const float[::1] s_lat2, const float[::1] c_lat2, const float[::1] s_lon2,
+                        const float[::1] c_lon2, const float[::1] cos_lat2, double a_threshold) noexcept nogil:
+    cdef int64_t j, count = 0
+    for j in range(window_lo[i], window_hi[i]):
+        if _hav(s_lat1[i], c_lat1[i], s_lon1[i], c_lon1[i], cos_lat1[i],
+                s_lat2[j], c_lat2[j], s_lon2[j], c_lon2[j], cos_lat2[j]) <= a_threshold:
+            count += 1
+    return count
+
+cdef void _fill_row(Py_ssize_t i, int64_t pos, const int64_t[::1] window_lo, const int64_t[::1] window_hi,
+                    const float[::1] s_lat1, const float[::1] c_lat1, const float[::1] s_lon1,
+                    const float[::1] c_lon1, const float[::1] cos_lat1,
+                    const float[::1] s_lat2, const float[::1] c_lat2, const float[::1] s_lon2,
+                    const float[::1] c_lon2, const float[::1] cos_lat2, double a_threshold,
+                    int64_t[::1] out_i, int64_t[::1] out_j) noexcept nogil:
+    cdef int64_t j
+    for j in range(window_lo[i], window_hi[i]):
+        if _hav(s_lat1[i], c_lat1[i], s_lon1[i], c_lon1[i], cos_lat1[i],
+                s_lat2[j], c_lat2[j], s_lon2[j], c_lon2[j], cos_lat2[j]) <= a_threshold:
+            out_i[pos] = i
+            out_j[pos] = j
+            pos += 1
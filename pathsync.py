@@ -1,30 +1,120 @@
 import json
-import re
+import os
+import mmap
+import zipfile
 import argparse
 import time
-from datetime import datetime, timedelta, timezone
+import functools
+from datetime import datetime, timezone
 import math
-from itertools import combinations
+from itertools import combinations, repeat
+from concurrent.futures import ProcessPoolExecutor
 
-# Import libraries for timezone conversion
+# Import libraries for vectorized matching and timezone conversion
 try:
+    import numpy as np
     from geopy.geocoders import Nominatim
     from geopy.exc import GeocoderTimedOut, GeocoderUnavailable
     from timezonefinder import TimezoneFinder
     import pytz
 except ImportError:
     print("Error: Required libraries not found. Please run:")
-    print("python3 -m pip install geopy timezonefinder pytz")
+    print("python3 -m pip install numpy geopy timezonefinder pytz")
     exit()
 
+# Optional: JIT-compiled matching kernel (falls back to vectorized NumPy)
+try:
+    from numba import config as numba_config, njit, prange, set_num_threads
+except ImportError:
+    njit = None
+
+# Optional: compiled window matcher, built with `cythonize -i _haversine.pyx`
+try:
+    from _haversine import match_windows as _match_windows_ext
+except ImportError:
+    _match_windows_ext = None
+
+# Optional: faster JSON decoding
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# Optional: SIMD JSON parser with lazily materialized values
+try:
+    import simdjson
+except ImportError:
+    simdjson = None
+
+# Optional: streaming JSON parser for very large exports
+try:
+    import ijson
+except ImportError:
+    ijson = None
+
+# Optional: persistent cache for reverse geocoding results across runs
+try:
+    import diskcache
+except ImportError:
+    diskcache = None
+
+# Optional: spatial index for dense timelines
+try:
+    from scipy.spatial import cKDTree
+except ImportError:
+    cKDTree = None
+
+EARTH_RADIUS_KM = 6371
+# Average candidates per event above which the KD-tree pre-filter beats a compiled window scan
+KDTREE_MIN_WINDOW = 512
+# Tile shape for the NumPy window scan: at most TILE_ROWS events by TILE_ELEMENTS cells,
+# so each tile's float32 temporaries stay cache-resident
+TILE_ROWS = 256
+TILE_ELEMENTS = 1 << 16
+# Slack added to the distance threshold for the float32 pre-filter, above its worst-case error
+FLOAT32_MARGIN_KM = 0.01
+# Files at least this large are streamed with ijson instead of loaded whole
+STREAM_MIN_BYTES = 64 * 1024 * 1024
+# Files at least this large are memory-mapped for orjson rather than read into a bytes copy
+MMAP_MIN_BYTES = 16 * 1024 * 1024
+GEOCODE_CACHE_DIR = '.geocode_cache'
+# Bump when the .npz timeline cache layout changes so older caches are rebuilt
+TIMELINE_CACHE_VERSION = 2
+
+def _geocode_cache_get(cache_key):
+    """Returns a geocoded address from the disk cache, or None on a miss or any cache failure."""
+    if diskcache is None:
+        return None
+    try:
+        with diskcache.Cache(GEOCODE_CACHE_DIR) as cache:
+            return cache.get(cache_key)
+    except Exception:  # unwritable or odd CWD, locked or corrupt sqlite file
+        return None
+
+def _geocode_cache_set(cache_key, address):
+    """Stores a geocoded address in the disk cache, ignoring any cache failure."""
+    if diskcache is None:
+        return
+    try:
+        with diskcache.Cache(GEOCODE_CACHE_DIR) as cache:
+            cache[cache_key] = address
+    except Exception:
+        pass
+
+@functools.lru_cache(maxsize=4096)
 def get_location_name(latitude, longitude):
-    """Performs a reverse geocode lookup with retries."""
-    geolocator = Nominatim(user_agent="nexus_point_analyzer_v4", timeout=10)
+    """Performs a reverse geocode lookup with retries, caching found addresses on disk (~11 m cells)."""
+    cache_key = (round(latitude, 4), round(longitude, 4))
+    address = _geocode_cache_get(cache_key)
+    if address is not None:
+        return address
+    geolocator = Nominatim(user_agent="nexus_point_analyzer_v4", timeout=15)
     for attempt in range(3):
         try:
             time.sleep(1)
             location = geolocator.reverse((latitude, longitude), exactly_one=True, language='en')
-            return location.address if location else "Unknown Location"
+            address = location.address if location else "Unknown Location"
+            break
         except (GeocoderTimedOut, GeocoderUnavailable):
             if attempt < 2:
                 print(f"  Location service timed out, retrying ({attempt + 2}/3)...")
@@ -33,12 +123,18 @@ def get_location_name(latitude, longitude):
                 return "Location service timed out or is unavailable."
         except Exception:
             return "Could not determine location name."
+    _geocode_cache_set(cache_key, address)
+    return address
+
+@functools.lru_cache(maxsize=None)
+def _timezone_finder():
+    # Loading the timezone polygons is slow, so build the finder once and reuse it
+    return TimezoneFinder()
 
 def get_local_time(utc_dt, lat, lon):
     """Converts a UTC datetime to the local time at the given coordinates."""
     try:
-        tf = TimezoneFinder()
-        tz_name = tf.timezone_at(lng=lon, lat=lat)
+        tz_name = _timezone_finder().timezone_at(lng=lon, lat=lat)
         if tz_name:
             local_tz = pytz.timezone(tz_name)
             return utc_dt.astimezone(local_tz)
@@ -49,106 +145,430 @@ def get_local_time(utc_dt, lat, lon):
 def load_json_file(file_path):
     """Loads a JSON file from the given path."""
     try:
+        if simdjson is not None:
+            os.stat(file_path)  # simdjson reports a missing file as a generic OSError
+            # Lazy document: only the fields the parsers visit are converted to Python objects
+            return simdjson.Parser().load(file_path)
+        if orjson is not None:
+            with open(file_path, 'rb') as f:
+                if os.fstat(f.fileno()).st_size < MMAP_MIN_BYTES:
+                    return orjson.loads(f.read())
+                # Let orjson read the page cache directly instead of copying the file into bytes
+                with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm, memoryview(mm) as view:
+                    return orjson.loads(view)
         with open(file_path, 'r', encoding='utf-8') as f:
             return json.load(f)
     except FileNotFoundError:
         print(f"Error: File not found at '{file_path}'. Skipping.")
         return None
-    except json.JSONDecodeError:
+    except ValueError:  # json/orjson JSONDecodeError and simdjson errors are all ValueErrors
         print(f"Error: Could not decode JSON from '{file_path}'. Skipping.")
         return None
 
+def parse_coordinates(text):
+    """Parses a 'lat°, lon°' or 'geo:lat,lon' string into a (latitude, longitude) tuple."""
+    lat, lon = text.replace('°', '').replace('geo:', '').split(',')
+    return float(lat), float(lon)
+
+def _year_bounds(start_year, end_year):
+    # ISO 8601 strings start with the four-digit year in their own UTC offset (matching
+    # datetime.year), so the filter can compare that prefix before parsing anything
+    return (f"{start_year:04d}" if start_year else '0000', f"{end_year:04d}" if end_year else '9999')
+
+# Handlers yield (timestamp, latitude, longitude) tuples. Hot lookups are bound to locals.
+
+def _visit_event(record, first_year, last_year):
+    """Builds an event from a visit record (startTime + visit.topCandidate.placeLocation)."""
+    try:
+        timestamp_str = record.get('startTime')
+        if first_year <= timestamp_str[:4] <= last_year:
+            lat, lon = parse_coordinates(record['visit']['topCandidate'].get('placeLocation', ''))
+            return datetime.fromisoformat(timestamp_str).timestamp(), lat, lon
+    except (KeyError, ValueError, TypeError, AttributeError):
+        pass
+    return None
+
+# Handler for formats like Aiden.json, Lukas.json
+def _parse_semantic_segments(segments, first_year, last_year):
+    fromiso, parse_coords = datetime.fromisoformat, parse_coordinates
+    for segment in segments:
+        path = segment.get('timelinePath')
+        if path:
+            for point in path:
+                try:
+                    timestamp_str = point.get('time')
+                    if first_year <= timestamp_str[:4] <= last_year:
+                        yield (fromiso(timestamp_str).timestamp(), *parse_coords(point.get('point', '')))
+                except (ValueError, TypeError, AttributeError): continue
+        elif 'visit' in segment:
+            event = _visit_event(segment, first_year, last_year)
+            if event: yield event
+
+# Handler for format like Kate.json
+def _parse_visit_items(items, first_year, last_year):
+    for item in items:
+        event = _visit_event(item, first_year, last_year)
+        if event: yield event
+
+# Handler for format like Hana.json
+def _parse_locations(locations, first_year, last_year):
+    fromiso = datetime.fromisoformat
+    for loc in locations:
+        try:
+            timestamp_str = loc.get('timestamp', '')
+            if first_year <= timestamp_str[:4] <= last_year:
+                yield (fromiso(timestamp_str.replace('Z', '+00:00')).timestamp(),
+                       loc.get('latitudeE7') / 1e7, loc.get('longitudeE7') / 1e7)
+        except (ValueError, TypeError, KeyError): continue
+
+# Record handlers keyed by the ijson prefix of the records they consume
+_STREAM_HANDLERS = {
+    'semanticSegments.item': _parse_semantic_segments,
+    'item': _parse_visit_items,
+    'locations.item': _parse_locations,
+}
+
+# Document types parse_timeline_data accepts as JSON objects and arrays
+_JSON_OBJECT_TYPES = (dict, simdjson.Object) if simdjson is not None else (dict,)
+_JSON_ARRAY_TYPES = (list, simdjson.Array) if simdjson is not None else (list,)
+
 def parse_timeline_data(json_data, start_year=None, end_year=None):
     """
-    Parses various timeline JSON structures and returns a standardized list of events.
+    Parses various timeline JSON structures and returns a standardized list of
+    (timestamp, latitude, longitude) events, with timestamps as POSIX seconds.
+    Events keep file order; build_timeline_arrays sorts them.
     """
-    events = []
-
-    def event_in_range(dt):
-        if start_year and dt.year < start_year: return False
-        if end_year and dt.year > end_year: return False
-        return True
-
-    # Handler for formats like Aiden.json, Lukas.json
-    if isinstance(json_data, dict) and 'semanticSegments' in json_data:
-        for segment in json_data.get('semanticSegments', []):
-            path = segment.get('timelinePath', [])
-            if path:
-                for point in path:
-                    try:
-                        timestamp = datetime.fromisoformat(point.get('time'))
-                        if event_in_range(timestamp):
-                            coords = re.findall(r"[-+]?\d+\.\d+", point.get('point', ''))
-                            if len(coords) == 2:
-                                events.append({'timestamp': timestamp, 'latitude': float(coords[0]), 'longitude': float(coords[1])})
-                    except (ValueError, TypeError): continue
-            elif 'visit' in segment:
-                 try:
-                    timestamp = datetime.fromisoformat(segment.get('startTime'))
-                    if event_in_range(timestamp):
-                        location = segment['visit']['topCandidate'].get('placeLocation', '')
-                        coords = re.findall(r"[-+]?\d+\.\d+", location)
-                        if len(coords) == 2:
-                            events.append({'timestamp': timestamp, 'latitude': float(coords[0]), 'longitude': float(coords[1])})
-                 except (KeyError, ValueError, TypeError): continue
-
-    # Handler for format like Kate.json
-    elif isinstance(json_data, list):
-        for item in json_data:
-            try:
-                timestamp = datetime.fromisoformat(item.get('startTime'))
-                if event_in_range(timestamp):
-                    location = item.get('visit', {}).get('topCandidate', {}).get('placeLocation', '')
-                    coords = re.findall(r"[-+]?\d+\.\d+", location)
-                    if len(coords) == 2:
-                        events.append({'timestamp': timestamp, 'latitude': float(coords[0]), 'longitude': float(coords[1])})
-            except (ValueError, TypeError): continue
-
-    # Handler for format like Hana.json
-    elif isinstance(json_data, dict) and 'locations' in json_data:
-        for loc in json_data.get('locations', []):
-            try:
-                timestamp_str = loc.get('timestamp', '').replace('Z', '+00:00')
-                timestamp = datetime.fromisoformat(timestamp_str)
-                if event_in_range(timestamp):
-                    lat = loc.get('latitudeE7') / 1e7
-                    lon = loc.get('longitudeE7') / 1e7
-                    events.append({'timestamp': timestamp, 'latitude': lat, 'longitude': lon})
-            except (ValueError, TypeError, KeyError): continue
-    
-    return sorted(events, key=lambda x: x['timestamp'])
+    year_bounds = _year_bounds(start_year, end_year)
+    if isinstance(json_data, _JSON_OBJECT_TYPES) and 'semanticSegments' in json_data:
+        events = _parse_semantic_segments(json_data.get('semanticSegments', []), *year_bounds)
+    elif isinstance(json_data, _JSON_ARRAY_TYPES):
+        events = _parse_visit_items(json_data, *year_bounds)
+    elif isinstance(json_data, _JSON_OBJECT_TYPES) and 'locations' in json_data:
+        events = _parse_locations(json_data.get('locations', []), *year_bounds)
+    else:
+        events = []
+    return list(events)
+
+def _detect_stream_prefix(f):
+    """Reads just enough of a timeline file to tell which record array it holds."""
+    for prefix, event, value in ijson.parse(f):
+        if prefix == '' and event == 'start_array':
+            return 'item'
+        if prefix == '' and event == 'map_key' and value in ('semanticSegments', 'locations'):
+            return value + '.item'
+    return None
 
-def haversine_distance(lat1, lon1, lat2, lon2):
-    """Calculates distance between two coordinates."""
-    lat1, lon1, lat2, lon2 = map(math.radians, [lat1, lon1, lat2, lon2])
-    dlon, dlat = lon2 - lon1, lat2 - lat1
-    a = math.sin(dlat/2)**2 + math.cos(lat1) * math.cos(lat2) * math.sin(dlon/2)**2
-    return 2 * math.asin(math.sqrt(a)) * 6371
+def stream_timeline_data(file_path, start_year=None, end_year=None):
+    """
+    Parses a timeline file record by record with ijson, so the whole document is never
+    held in memory. Returns the same list of events as parse_timeline_data.
+    """
+    with open(file_path, 'rb') as f:
+        prefix = _detect_stream_prefix(f)
+        if prefix is None:
+            return []
+        f.seek(0)
+        records = ijson.items(f, prefix, use_float=True)
+        events = _STREAM_HANDLERS[prefix](records, *_year_bounds(start_year, end_year))
+        return list(events)
+
+def load_timeline(file_path, start_year=None, end_year=None):
+    """Loads and parses a timeline file, streaming large files when ijson is available."""
+    if ijson is None or not os.path.isfile(file_path) or os.path.getsize(file_path) < STREAM_MIN_BYTES:
+        raw_data = load_json_file(file_path)
+        return parse_timeline_data(raw_data, start_year, end_year) if raw_data else None
+    try:
+        return stream_timeline_data(file_path, start_year, end_year)
+    except ijson.JSONError:
+        print(f"Error: Could not decode JSON from '{file_path}'. Skipping.")
+        return None
+
+def build_timeline_arrays(events):
+    """Converts a list of (timestamp, latitude, longitude) events into time-sorted parallel NumPy arrays."""
+    table = np.array(events, dtype=np.float64).reshape(-1, 3)
+    order = np.argsort(table[:, 0], kind='stable')
+    return timeline_from_columns(*(table[order, k] for k in range(3)))
+
+def timeline_from_columns(ts, lat, lon):
+    """Builds the timeline arrays used for matching from time-sorted timestamp, latitude and longitude columns."""
+    half_lat, half_lon = np.radians(lat) / 2, np.radians(lon) / 2
+    return {
+        'ts': ts,
+        'lat': lat,
+        'lon': lon,
+        # Half-angle sines/cosines so the pre-filter needs no trig per pair (see haversine_a).
+        # float32 halves the memory the matching kernels stream through; candidates are
+        # re-checked in float64 from 'lat'/'lon' (see haversine_a_exact).
+        'sin_half_lat': np.sin(half_lat).astype(np.float32),
+        'cos_half_lat': np.cos(half_lat).astype(np.float32),
+        'sin_half_lon': np.sin(half_lon).astype(np.float32),
+        'cos_half_lon': np.cos(half_lon).astype(np.float32),
+        'cos_lat': np.cos(2 * half_lat).astype(np.float32),
+    }
+
+def timeline_event(timeline, index):
+    """Rehydrates a single event dict from a timeline's arrays."""
+    return {
+        'timestamp': datetime.fromtimestamp(timeline['ts'][index], timezone.utc),
+        'latitude': float(timeline['lat'][index]),
+        'longitude': float(timeline['lon'][index]),
+    }
+
+def _trig_arrays(timeline):
+    return (timeline['sin_half_lat'], timeline['cos_half_lat'],
+            timeline['sin_half_lon'], timeline['cos_half_lon'], timeline['cos_lat'])
+
+def haversine_a(timeline1, index1, timeline2, index2):
+    """
+    Computes the haversine term a = sin²(Δlat/2) + cos(lat1)cos(lat2)sin²(Δlon/2) between
+    events of two timelines. Indices may be ints, slices or broadcastable index arrays.
+    sin(Δ/2) is expanded as sin(x2/2)cos(x1/2) - cos(x2/2)sin(x1/2) from the precomputed
+    float32 terms, so this is a pre-filter accurate to a few metres.
+    """
+    sin_lat1, cos_lat1_half, sin_lon1, cos_lon1_half, cos_lat1 = (arr[index1] for arr in _trig_arrays(timeline1))
+    sin_lat2, cos_lat2_half, sin_lon2, cos_lon2_half, cos_lat2 = (arr[index2] for arr in _trig_arrays(timeline2))
+    sin_dlat = sin_lat2 * cos_lat1_half - cos_lat2_half * sin_lat1
+    sin_dlon = sin_lon2 * cos_lon1_half - cos_lon2_half * sin_lon1
+    return sin_dlat**2 + cos_lat1 * cos_lat2 * sin_dlon**2
+
+def haversine_a_exact(timeline1, index1, timeline2, index2):
+    """Computes the haversine term between events of two timelines in float64 from their degrees."""
+    lat1, lon1 = np.radians(timeline1['lat'][index1]), np.radians(timeline1['lon'][index1])
+    lat2, lon2 = np.radians(timeline2['lat'][index2]), np.radians(timeline2['lon'][index2])
+    return np.sin((lat2 - lat1)/2)**2 + np.cos(lat1) * np.cos(lat2) * np.sin((lon2 - lon1)/2)**2
+
+def haversine_a_threshold(distance_km):
+    """Converts a distance into the haversine term it corresponds to, for comparing against haversine_a."""
+    return math.sin(min(distance_km / (2 * EARTH_RADIUS_KM), math.pi / 2))**2
+
+def distance_from_a(a):
+    """Converts haversine terms into distances in km."""
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(a))
+
+def _match_windows_numpy(data1, data2, window_lo, window_hi, a_threshold):
+    """
+    Scans the time windows in tiles: a block of data1 events is broadcast against the
+    union of their data2 windows, so that slice of data2 is loaded once per tile rather
+    than once per event. Returns candidate index arrays.
+    """
+    capacity, count = 1024, 0
+    hits_i, hits_j = np.empty(capacity, np.int64), np.empty(capacity, np.int64)
+    n, i0 = len(window_lo), 0
+    while i0 < n:
+        # Windows only move forward, so a tile's union window runs from its first lo to its last hi
+        rows = TILE_ROWS
+        while rows > 1 and rows * (window_hi[min(i0 + rows, n) - 1] - window_lo[i0]) > TILE_ELEMENTS:
+            rows //= 2
+        i1 = min(i0 + rows, n)
+        lo, hi = window_lo[i0], window_hi[i1 - 1]
+        if hi > lo:
+            columns = np.arange(lo, hi)
+            a = haversine_a(data1, (slice(i0, i1), None), data2, slice(lo, hi))
+            in_window = (columns >= window_lo[i0:i1, None]) & (columns < window_hi[i0:i1, None])
+            r, c = np.nonzero(in_window & (a <= a_threshold))
+            if count + len(r) > capacity:
+                # Grow geometrically so appends stay amortized O(1)
+                capacity = max(2 * capacity, count + len(r))
+                hits_i, hits_j = np.resize(hits_i, capacity), np.resize(hits_j, capacity)
+            hits_i[count:count + len(r)] = i0 + r
+            hits_j[count:count + len(r)] = lo + c
+            count += len(r)
+        i0 = i1
+    return hits_i[:count], hits_j[:count]
+
+def _kdtree_points(timeline, t0, time_threshold, chord_threshold):
+    """Scales events to (time, unit-sphere x, y, z) so a match lies within 1 in every axis."""
+    lat, lon = np.radians(timeline['lat']), np.radians(timeline['lon'])
+    cos_lat = np.cos(lat)
+    return np.column_stack((
+        (timeline['ts'] - t0) / time_threshold,
+        cos_lat * np.cos(lon) / chord_threshold,
+        cos_lat * np.sin(lon) / chord_threshold,
+        np.sin(lat) / chord_threshold,
+    ))
+
+def _match_kdtree(data1, data2, time_threshold, a_threshold):
+    """
+    Finds candidate pairs with a KD-tree box query and keeps those passing the exact time
+    check. Using chord distance on the unit sphere keeps the box a strict superset of true
+    matches at any latitude and across the antimeridian.
+    """
+    ts1, ts2 = data1['ts'], data2['ts']
+    chord_threshold = 2 * math.sqrt(a_threshold)  # chord = 2·sin(d/2R) = 2·sqrt(a)
+    t0 = min(ts1[0], ts2[0])
+    tree1 = cKDTree(_kdtree_points(data1, t0, time_threshold, chord_threshold))
+    tree2 = cKDTree(_kdtree_points(data2, t0, time_threshold, chord_threshold))
+    pairs = tree1.sparse_distance_matrix(tree2, 1 + 1e-9, p=np.inf, output_type='ndarray')
+    i, j = pairs['i'].astype(np.int64), pairs['j'].astype(np.int64)
+    keep = np.abs(ts1[i] - ts2[j]) <= time_threshold
+    i, j = i[keep], j[keep]
+    order = np.lexsort((j, i))
+    return i[order], j[order]
+
+if njit is not None:
+    @njit(fastmath=True, cache=True)
+    def _haversine_a_nb(s_lat1, c_lat1, s_lon1, c_lon1, cos_lat1, s_lat2, c_lat2, s_lon2, c_lon2, cos_lat2):
+        sin_dlat = s_lat2 * c_lat1 - c_lat2 * s_lat1
+        sin_dlon = s_lon2 * c_lon1 - c_lon2 * s_lon1
+        return sin_dlat * sin_dlat + cos_lat1 * cos_lat2 * sin_dlon * sin_dlon
+
+    @njit(parallel=True, fastmath=True, cache=True)
+    def _match_windows_nb(window_lo, window_hi,
+                          s_lat1, c_lat1, s_lon1, c_lon1, cos_lat1,
+                          s_lat2, c_lat2, s_lon2, c_lon2, cos_lat2, a_threshold):
+        """Two-pass parallel pre-filter: count hits per event, then fill preallocated index arrays."""
+        n = len(window_lo)
+        counts = np.zeros(n + 1, np.int64)
+        for i in prange(n):
+            c = 0
+            for j in range(window_lo[i], window_hi[i]):
+                if _haversine_a_nb(s_lat1[i], c_lat1[i], s_lon1[i], c_lon1[i], cos_lat1[i],
+                                   s_lat2[j], c_lat2[j], s_lon2[j], c_lon2[j], cos_lat2[j]) <= a_threshold:
+                    c += 1
+            counts[i + 1] = c
+        offsets = np.cumsum(counts)
+        out_i = np.empty(offsets[n], np.int64)
+        out_j = np.empty(offsets[n], np.int64)
+        for i in prange(n):
+            pos = offsets[i]
+            for j in range(window_lo[i], window_hi[i]):
+                if _haversine_a_nb(s_lat1[i], c_lat1[i], s_lon1[i], c_lon1[i], cos_lat1[i],
+                                   s_lat2[j], c_lat2[j], s_lon2[j], c_lon2[j], cos_lat2[j]) <= a_threshold:
+                    out_i[pos], out_j[pos] = i, j
+                    pos += 1
+        return out_i, out_j
+
+# A prebuilt extension needs no JIT warm-up, so prefer it over Numba when both are present
+def _match_windows_ext_capped(*args):
+    return _match_windows_ext(*args, num_threads=_kernel_threads)
+
+_match_windows_compiled = (_match_windows_ext_capped if _match_windows_ext is not None
+                           else _match_windows_nb if njit is not None else None)
 
 def compare_timelines(data1, data2, time_threshold_minutes=2, distance_threshold_km=0.1):
-    """Compares two sorted timelines to find proximity events."""
-    matches = []
-    time_threshold = timedelta(minutes=time_threshold_minutes)
-    i, j = 0, 0
-    while i < len(data1) and j < len(data2):
-        time_difference = data1[i]['timestamp'] - data2[j]['timestamp']
-        if time_difference > time_threshold: j += 1; continue
-        if time_difference < -time_threshold: i += 1; continue
-        k = j
-        while k < len(data2):
-            event2 = data2[k]
-            sub_time_diff = abs(data1[i]['timestamp'] - event2['timestamp'])
-            if sub_time_diff > time_threshold: break
-            distance = haversine_distance(data1[i]['latitude'], data1[i]['longitude'], event2['latitude'], event2['longitude'])
-            if distance <= distance_threshold_km:
-                matches.append({'event1': data1[i], 'event2': event2, 'time_difference': sub_time_diff, 'distance_km': distance})
-            k += 1
-        i += 1
-    return matches
+    """Compares two timelines (as built by build_timeline_arrays) to find proximity events."""
+    ts1, ts2 = data1['ts'], data2['ts']
+    time_threshold = time_threshold_minutes * 60
+    # Compare raw haversine terms against a fixed cutoff instead of computing every distance.
+    # The float32 pre-filter can be off by a few metres, so it runs with a margin and its
+    # candidates are re-checked exactly in float64.
+    a_threshold = haversine_a_threshold(distance_threshold_km)
+    coarse_a_threshold = haversine_a_threshold(distance_threshold_km + FLOAT32_MARGIN_KM)
+    # Binary search the window of data2 events within the time threshold of each data1 event.
+    # Searching on both bounds keeps runs of duplicate timestamps inside the window.
+    window_lo = np.searchsorted(ts2, ts1 - time_threshold, 'left')
+    window_hi = np.searchsorted(ts2, ts1 + time_threshold, 'right')
+    candidates = int((window_hi - window_lo).sum())
+    if (cKDTree is not None and time_threshold > 0 and a_threshold > 0
+            and (_match_windows_compiled is None or candidates > KDTREE_MIN_WINDOW * len(ts1))):
+        cand_i, cand_j = _match_kdtree(data1, data2, time_threshold, a_threshold)
+    elif _match_windows_compiled is not None:
+        cand_i, cand_j = _match_windows_compiled(window_lo, window_hi, *_trig_arrays(data1), *_trig_arrays(data2), coarse_a_threshold)
+    else:
+        cand_i, cand_j = _match_windows_numpy(data1, data2, window_lo, window_hi, coarse_a_threshold)
+    a = haversine_a_exact(data1, cand_i, data2, cand_j)
+    keep = a <= a_threshold
+    hits_i, hits_j = cand_i[keep], cand_j[keep]
+    # Matches are parallel arrays of event indices; datetimes are only rebuilt for the reported match
+    return {
+        'index1': hits_i,
+        'index2': hits_j,
+        'time_difference': np.abs(ts1[hits_i] - ts2[hits_j]),
+        'distance_km': distance_from_a(a[keep]),
+    }
 
 def find_closest_match(matches):
-    """Finds the single best match from a list."""
-    return min(matches, key=lambda x: x['distance_km']) if matches else None
+    """Finds the single best match in a set of matches, as a dict of scalars."""
+    if not len(matches['distance_km']):
+        return None
+    k = np.argmin(matches['distance_km'])
+    return {key: values[k].item() for key, values in matches.items()}
+
+def timeline_cache_path(file_path, start_year=None, end_year=None):
+    return f"{file_path}.{start_year or 'all'}-{end_year or 'all'}.npz"
+
+def _source_signature(file_path):
+    """Identifies the exact version of a source file a cache was built from."""
+    stat = os.stat(file_path)
+    return np.array([TIMELINE_CACHE_VERSION, stat.st_mtime_ns, stat.st_size], dtype=np.int64)
+
+def load_cached_timeline(file_path, start_year=None, end_year=None):
+    """Returns the cached timeline arrays for a file, or None if there is no up-to-date cache."""
+    cache_path = timeline_cache_path(file_path, start_year, end_year)
+    try:
+        with np.load(cache_path) as cached:
+            # Require the exact source mtime and size: copies made with cp -p, rsync -a or
+            # unzip can replace a file with one whose mtime is older than the cache
+            if not np.array_equal(cached['source'], _source_signature(file_path)):
+                return None
+            return timeline_from_columns(cached['ts'], cached['lat'], cached['lon'])
+    except (OSError, ValueError, KeyError, EOFError, zipfile.BadZipFile):  # missing, stale or corrupt cache
+        return None
+
+def save_cached_timeline(timeline, file_path, source_signature, start_year=None, end_year=None):
+    """Writes a timeline's sorted columns next to the source file for reuse by later runs."""
+    cache_path = timeline_cache_path(file_path, start_year, end_year)
+    temp_path = f"{cache_path}.{os.getpid()}.tmp"
+    try:
+        with open(temp_path, 'wb') as f:
+            np.savez(f, ts=timeline['ts'], lat=timeline['lat'], lon=timeline['lon'], source=source_signature)
+        os.replace(temp_path, cache_path)  # atomic, so concurrent runs never read a partial cache
+    except OSError:
+        if os.path.exists(temp_path): os.remove(temp_path)
+
+def process_file(file_path, start_year=None, end_year=None, use_cache=True):
+    """Loads a timeline file and converts it to arrays. Returns None if it could not be read."""
+    source_signature = None
+    if use_cache:
+        timeline = load_cached_timeline(file_path, start_year, end_year)
+        if timeline is not None:
+            return timeline
+        try:
+            # Taken before parsing, so a file modified mid-parse is not cached as current
+            source_signature = _source_signature(file_path)
+        except OSError:
+            pass
+    events = load_timeline(file_path, start_year, end_year)
+    if events is None:
+        return None
+    timeline = build_timeline_arrays(events)
+    if source_signature is not None:
+        save_cached_timeline(timeline, file_path, source_signature, start_year, end_year)
+    return timeline
+
+# Timelines shared with pair-comparison workers, set once per process by _init_pair_worker
+_worker_timelines = {}
+# Thread cap for the parallel compiled kernels in this process (0 means all cores)
+_kernel_threads = 0
+
+def _init_pair_worker(timelines, kernel_threads=0):
+    global _worker_timelines, _kernel_threads
+    _worker_timelines = timelines
+    # Each pool worker runs a multithreaded kernel, so split the cores between them
+    _kernel_threads = kernel_threads
+    if njit is not None and kernel_threads:
+        set_num_threads(min(kernel_threads, numba_config.NUMBA_NUM_THREADS))
+
+def compare_pair(file1, file2, time_threshold_minutes, distance_threshold_km):
+    """Compares two loaded timelines by name, returning (match count, closest match)."""
+    matches = compare_timelines(_worker_timelines[file1], _worker_timelines[file2], time_threshold_minutes, distance_threshold_km)
+    return len(matches['distance_km']), find_closest_match(matches)
+
+def map_jobs(fn, jobs, *iterables, initializer=None, initargs=()):
+    """Maps fn over the iterables in a process pool, or in this process when one job suffices."""
+    tasks = list(zip(*iterables))
+    if jobs <= 1 or len(tasks) <= 1:
+        if initializer: initializer(*initargs)
+        return [fn(*task) for task in tasks]
+    with ProcessPoolExecutor(max_workers=min(jobs, len(tasks)), initializer=initializer, initargs=initargs) as executor:
+        return list(executor.map(fn, *zip(*tasks)))
+
+def positive_int(value):
+    """argparse type for counts that must be at least 1."""
+    number = int(value)
+    if number < 1:
+        raise argparse.ArgumentTypeError(f"must be a positive integer, got {value}")
+    return number
 
 def main():
     """Main function to execute the script."""
@@ -158,17 +578,19 @@ def main():
     parser.add_argument("--distance", type=float, default=100, help="Distance threshold in METERS (default: 100).")
     parser.add_argument("--start-year", type=int, help="Starting year for analysis.")
     parser.add_argument("--end-year", type=int, help="Ending year for analysis.")
+    parser.add_argument("--jobs", type=positive_int, default=os.cpu_count() or 1, help="Number of worker processes (default: number of CPUs).")
+    parser.add_argument("--no-cache", action="store_true", help="Always re-parse files instead of reusing cached .npz copies.")
+    parser.add_argument("--closest-only", action="store_true", help="Only search for the closest match, skipping full match counts.")
     args = parser.parse_args()
     
     start_time = time.time()
     processed_data = {}
-    for file_path in args.files:
-        raw_data = load_json_file(file_path)
-        if raw_data:
-            events = parse_timeline_data(raw_data, args.start_year, args.end_year)
-            if events:
-                print(f"Successfully processed {file_path}, found {len(events)} events.")
-                processed_data[file_path] = events
+    timelines = map_jobs(process_file, args.jobs, args.files, repeat(args.start_year), repeat(args.end_year), repeat(not args.no_cache))
+    for file_path, timeline in zip(args.files, timelines):
+        if timeline is not None:
+            if len(timeline['ts']):
+                print(f"Successfully processed {file_path}, found {len(timeline['ts'])} events.")
+                processed_data[file_path] = timeline
             else:
                 print(f"Warning: No valid events found in {file_path} for the specified year range.")
     
@@ -177,23 +599,45 @@ def main():
         return
 
     total_matches, overall_closest_match = 0, None
-    for (file1, data1), (file2, data2) in combinations(processed_data.items(), 2):
-        print(f"\n--- Comparing {file1} and {file2} ---")
-        matches = compare_timelines(data1, data2, args.time, args.distance / 1000)
-        if matches:
-            total_matches += len(matches)
-            closest_pair_match = find_closest_match(matches)
-            print(f"Found {len(matches)} matches. Closest match in this pair: {closest_pair_match['distance_km'] * 1000:.2f} meters.")
-            if overall_closest_match is None or closest_pair_match['distance_km'] < overall_closest_match['distance_km']:
+    distance_threshold_km = args.distance / 1000
+    pairs = list(combinations(processed_data, 2))
+    if args.closest_only:
+        # Later pairs only need to beat the best match so far, so tighten the threshold as it
+        # improves. This is inherently sequential; the matching kernels parallelize within a pair.
+        _init_pair_worker(processed_data)
+        for file1, file2 in pairs:
+            print(f"\n--- Comparing {file1} and {file2} ---")
+            if overall_closest_match:
+                distance_threshold_km = min(distance_threshold_km, overall_closest_match['distance_km'])
+            _, closest_pair_match = compare_pair(file1, file2, args.time, distance_threshold_km)
+            if closest_pair_match and (overall_closest_match is None or closest_pair_match['distance_km'] < overall_closest_match['distance_km']):
+                print(f"New closest match: {closest_pair_match['distance_km'] * 1000:.2f} meters.")
                 overall_closest_match = closest_pair_match
                 overall_closest_match['files'] = (file1, file2)
-        else:
-            print("No matches found.")
+            else:
+                print("No closer match found.")
+    else:
+        kernel_threads = max(1, (os.cpu_count() or 1) // min(args.jobs, len(pairs)))
+        results = map_jobs(compare_pair, args.jobs, *zip(*pairs), repeat(args.time), repeat(distance_threshold_km),
+                           initializer=_init_pair_worker, initargs=(processed_data, kernel_threads))
+        for (file1, file2), (match_count, closest_pair_match) in zip(pairs, results):
+            print(f"\n--- Comparing {file1} and {file2} ---")
+            if match_count:
+                total_matches += match_count
+                print(f"Found {match_count} matches. Closest match in this pair: {closest_pair_match['distance_km'] * 1000:.2f} meters.")
+                if overall_closest_match is None or closest_pair_match['distance_km'] < overall_closest_match['distance_km']:
+                    overall_closest_match = closest_pair_match
+                    overall_closest_match['files'] = (file1, file2)
+            else:
+                print("No matches found.")
 
-    print(f"\n--- Overall Results ---\nTotal matches found across all files: {total_matches}")
+    print("\n--- Overall Results ---")
+    if not args.closest_only:
+        print(f"Total matches found across all files: {total_matches}")
     if overall_closest_match:
-        event1, event2 = overall_closest_match['event1'], overall_closest_match['event2']
         files = overall_closest_match['files']
+        event1 = timeline_event(processed_data[files[0]], overall_closest_match['index1'])
+        event2 = timeline_event(processed_data[files[1]], overall_closest_match['index2'])
         
         # Convert to UTC first to ensure a correct base for local conversion
         event1_ts_utc = event1['timestamp'].astimezone(timezone.utc)
@@ -209,7 +653,7 @@ def main():
         print(f"\nThe absolute closest match was between '{files[0]}' and '{files[1]}':")
         print(f"  Location Name: {location_name}")
         print(f"  Distance: {overall_closest_match['distance_km'] * 1000:.2f} meters")
-        print(f"  Time Difference: {overall_closest_match['time_difference'].total_seconds():.2f} seconds")
+        print(f"  Time Difference: {overall_closest_match['time_difference']:.2f} seconds")
         print(f"  - {files[0]} Location: Lat {event1['latitude']}, Lon {event1['longitude']}")
         print(f"    - Timestamp: {event1_ts_local.strftime('%Y-%m-%d %H:%M:%S %Z%z')}")
         print(f"  - {files[1]} Location: Lat {event2['latitude']}, Lon {event2['longitude']}")